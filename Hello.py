@@ -12,134 +12,70 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pandas as pd
 import streamlit as st
 from streamlit.logger import get_logger
 
+from sync_procedure import Column, generate_stored_procedure
+
 LOGGER = get_logger(__name__)
 
+# Static page content, kept in one place so run() only emits it
+PAGE_TITLE = "MS SQL Sync Stored Procedure Generator"
+INSTRUCTIONS = "\n".join([
+    "Enter the source and target tables. Enter the field names and types.",
+    "Click generate.",
+    "Edit the provided stored procedure further if required.",
+])
+COLUMN_TYPES = ["int", "uniqueidentifier", "nvarchar(50)", "date", "decimal(10, 3)", "bit"]
+DEFAULT_COLUMN_TYPE = "nvarchar(50)"
+UNIQUE_ID_NOTE = (
+    "**Note:** The first entry below is treated as the unique ID column. This column is used to match records "
+    "between the source and target tables for updates, deletions, and insertions."
+)
+
 
-def default_value(data_type):
-    if "uniqueidentifier" in data_type:
-        return "'00000000-0000-0000-0000-000000000000'"  # Valid nil UUID
-    elif "int" in data_type or "decimal" in data_type:
-        return "0"
-    elif "bit" in data_type:
-        return "0"
-    else:
-        return "''"
-
-
-def generate_stored_procedure(target_table, source_table, columns):
-    procedure_name = "stp_sync_{}".format(target_table.replace('[dbo].[', '').replace(']', ''))
-
-    # Ensure there is at least one column provided
-    if not columns:
-        raise ValueError("No columns provided for the stored procedure.")
-
-    first_column_name = columns[0]['name']  # Dynamically get the first column name for the join condition
-
-    set_statements = ",\n        ".join(
-        ["target.{0} = COALESCE(src.{0}, {1})".format(col['name'], default_value(col['type'])) 
-         if 'uniqueidentifier' not in col['type'] else 
-         "target.{0} = ISNULL(src.{0}, '00000000-0000-0000-0000-000000000000')".format(col['name'])
-         for col in columns])
-    where_conditions = " OR\n        ".join(
-        ["COALESCE(target.{0}, {1}) <> COALESCE(src.{0}, {1}){2}".format(
-            col['name'], 
-            default_value(col['type']), 
-            " COLLATE DATABASE_DEFAULT" if 'nvarchar' in col['type'] else "")
-         for col in columns])
-
-    script = [
-        "USE [DW]",
-        "GO",
-        "/****** Object:  StoredProcedure [dbo].[{}] ******/".format(procedure_name),
-        "SET ANSI_NULLS ON",
-        "GO",
-        "SET QUOTED_IDENTIFIER ON",
-        "GO",
-        "CREATE OR ALTER PROCEDURE [dbo].[{}]".format(procedure_name),
-        "AS",
-        "BEGIN",
-        "    SET NOCOUNT ON;",
-        "    -- Update existing records only if changes are detected",
-        "    UPDATE target",
-        "    SET ",
-        "        {}".format(set_statements),
-        "    FROM ",
-        "        {} target".format(target_table),  # Correctly formatted to include 'target' alias
-        "    INNER JOIN ",
-        "        {} src".format(source_table),
-        "    ON ",
-        "        target.{} = src.{}".format(first_column_name, first_column_name),  # Use the first column name for the join
-        "    WHERE ",
-        "        {};".format(where_conditions),
-        "    -- Delete records that no longer exist in the source",
-        "    DELETE target",  # Make sure 'FROM target' is correctly aliased
-        "    FROM {} target".format(target_table),  # Correctly formatted to include 'target' alias
-        "    WHERE NOT EXISTS (",
-        "        SELECT 1",
-        "        FROM {} src".format(source_table),
-        "        WHERE target.{} = src.{}".format(first_column_name, first_column_name),  # Assuming first column is the joining key
-        "    );",
-        "    -- Insert new records",
-        "    INSERT INTO {} (".format(target_table),
-        "        {}".format(",\n        ".join([col['name'] for col in columns])),
-        "    )",
-        "    SELECT ",
-        "        {}".format(",\n        ".join([
-            "ISNULL(src.{0}, '00000000-0000-0000-0000-000000000000')".format(col['name']) if 'uniqueidentifier' in col['type'] else 
-            "COALESCE(src.{0}, {1})".format(col['name'], default_value(col['type']))
-            for col in columns])),
-        "    FROM ",
-        "        {} src".format(source_table),
-        "    WHERE NOT EXISTS (",
-        "        SELECT 1",
-        "        FROM {} target".format(target_table),  # Correctly formatted to include 'target' alias
-        "        WHERE target.{} = src.{}".format(first_column_name, first_column_name),  # Use the first column name for insertion check
-        "    );",
-        "END",
-        "GO"
-    ]
-
-    return "\n".join(script)
+# Reruns with unchanged inputs return the cached script; columns is a hashable tuple of Column
+@st.cache_data(show_spinner=False)
+def cached_stored_procedure(target_table, source_table, columns):
+    return generate_stored_procedure(target_table, source_table, columns)
 
 
 
 
 def run():
-    st.set_page_config(
-        page_title="MS SQL Sync Stored Procedure Generator",
-        page_icon="↔️",
-    )
-
-    st.title('MS SQL Sync Stored Procedure Generator')
-    st.text('Enter the source and target tables. Enter the field names and types.')
-    st.text('Click generate.')
-    st.text('Edit the provided stored procedure further if required.')
-
-    # User inputs
-    target_table = st.text_input('Target Table Name', '[dbo].[tbl_dw_Target]')
-    source_table = st.text_input('Source Table Name', '[SRV-SQL].[DB].[dbo].[Source]')
-
-    st.markdown("""
-    **Note:** The first entry below is treated as the unique ID column. This column is used to match records between the source and target tables for updates, deletions, and insertions.
-    """)
-
-    # Dynamic columns
-    columns = []
-    columns_number = st.number_input('Number of Columns', min_value=0, max_value=20, step=1, value=1)
-    for i in range(columns_number):
-        with st.container():
-            col1, col2 = st.columns(2)
-            with col1:
-                col_name = st.text_input(f'Column {i+1} Name', value="Column_Name", key=f"name_{i}")
-            with col2:
-                col_type = st.selectbox(f'Column {i+1} Type', options=["int", "uniqueidentifier", "nvarchar(50)", "date", "decimal(10, 3)", "bit"], index=2, key=f"type_{i}")
-            columns.append({'name': col_name, 'type': col_type})
-
-    if st.button('Generate Stored Procedure'):
-        script = generate_stored_procedure(target_table, source_table, columns)
+    st.set_page_config(page_title=PAGE_TITLE, page_icon="↔️")
+
+    st.title(PAGE_TITLE)
+    st.text(INSTRUCTIONS)
+
+    # User inputs are batched in a form, so editing them does not rerun the script until submit
+    with st.form("procedure_form"):
+        target_table = st.text_input('Target Table Name', '[dbo].[tbl_dw_Target]')
+        source_table = st.text_input('Source Table Name', '[SRV-SQL].[DB].[dbo].[Source]')
+
+        st.markdown(UNIQUE_ID_NOTE)
+
+        # Dynamic columns, edited as one grid; rows can be added and removed in place
+        columns_df = st.data_editor(
+            pd.DataFrame({'name': ["Column_Name"], 'type': [DEFAULT_COLUMN_TYPE]}),
+            key="columns_editor",
+            num_rows="dynamic",
+            hide_index=True,
+            width="stretch",
+            column_config={
+                'name': st.column_config.TextColumn('Column Name', default="Column_Name", required=True),
+                'type': st.column_config.SelectboxColumn(
+                    'Column Type', options=COLUMN_TYPES, default=DEFAULT_COLUMN_TYPE, required=True),
+            },
+        )
+
+        submitted = st.form_submit_button('Generate Stored Procedure')
+
+    if submitted:
+        columns = tuple(  # Skip rows that are still incomplete
+            Column(row.name, row.type) for row in columns_df.dropna().itertuples(index=False))
+        script = cached_stored_procedure(target_table, source_table, columns)
         st.text_area("Stored Procedure Script:", script, height=300)
 
 
@@ -0,0 +1,160 @@
+# Copyright (c) Streamlit Inc. (2018-2022) Snowflake Inc. (2022)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import functools
+import re
+
+from jinja2 import BaseLoader, Environment
+
+# A column of the synced table; a tuple, so lists of columns are hashable for caching
+Column = collections.namedtuple('Column', ['name', 'type'])
+
+# One compiled pass classifies the type; each group maps to the default in _TYPE_DEFAULTS
+_TYPE_RE = re.compile(r"(uniqueidentifier)|(int|decimal)|(bit)")
+_TYPE_DEFAULTS = (
+    "'00000000-0000-0000-0000-000000000000'",  # Valid nil UUID
+    "0",
+    "0",
+)
+
+
+@functools.lru_cache(maxsize=32)
+def default_value(data_type):
+    match = _TYPE_RE.search(data_type)
+    return _TYPE_DEFAULTS[match.lastindex - 1] if match else "''"
+
+
+# Drops the "[dbo].[" prefix and closing brackets from the target table in one scan
+_TABLE_NAME_STRIP_RE = re.compile(r"\[dbo\]\.\[|\]")
+
+def quote_identifier(name):
+    # Same rule as QUOTENAME: "]" is escaped by doubling it. One outer [...] pair the user typed
+    # is dropped first, so "[Col]" and "Col" both become [Col] while "a]b" stays [a]]b]
+    if len(name) >= 2 and name.startswith('[') and name.endswith(']'):
+        name = name[1:-1]
+    return "[{}]".format(name.replace(']', ']]'))
+
+
+# Separators for the per-column fragments, matching the template's indentation
+_LIST_SEPARATOR = ",\n        "
+_OR_SEPARATOR = " OR\n        "
+
+_EMPTY_SCRIPT = "-- No columns provided\n"
+
+# Compiled once when this module is first imported. Hello.py is re-executed on every Streamlit
+# rerun, but imported modules stay loaded, so reruns reuse the compiled template.
+_ENV = Environment(loader=BaseLoader(), trim_blocks=True, lstrip_blocks=True)
+_PROCEDURE_TEMPLATE = _ENV.from_string("""\
+USE [DW]
+GO
+/****** Object:  StoredProcedure [dbo].[{{ procedure_name }}] ******/
+SET ANSI_NULLS ON
+GO
+SET QUOTED_IDENTIFIER ON
+GO
+CREATE OR ALTER PROCEDURE [dbo].[{{ procedure_name }}]
+AS
+BEGIN
+    SET NOCOUNT ON;
+    -- Update existing records only if changes are detected
+    UPDATE target
+    SET 
+        {{ set_statements }}
+    FROM 
+        {{ target_table }} target
+    INNER JOIN 
+        {{ source_table }} src
+    ON 
+        target.{{ first_col }} = src.{{ first_col }}
+    WHERE 
+        {{ where_conditions }};
+    -- Delete records that no longer exist in the source
+    DELETE target
+    FROM {{ target_table }} target
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM {{ source_table }} src
+        WHERE target.{{ first_col }} = src.{{ first_col }}
+    );
+    -- Insert new records
+    INSERT INTO {{ target_table }} (
+        {{ insert_columns }}
+    )
+    SELECT 
+        {{ select_columns }}
+    FROM 
+        {{ source_table }} src
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM {{ target_table }} target
+        WHERE target.{{ first_col }} = src.{{ first_col }}
+    );
+END
+GO
+""")
+
+
+# Bounded because the column grid has no row limit, so distinct type tuples are unbounded too
+@functools.lru_cache(maxsize=128)
+def column_fragment_templates(column_types):
+    # Specializes the per-column SQL for one tuple of column types: defaults and GUID/collation
+    # choices are folded in, leaving a "{i}" placeholder where the i-th column name goes.
+    # Lives in this imported module so the cache survives Streamlit reruns of Hello.py.
+    set_statements, where_conditions, insert_columns, select_columns = [], [], [], []
+    for i, col_type in enumerate(column_types):
+        name = "{%d}" % i
+        default = default_value(col_type)
+        # The same null-safe source expression feeds both the UPDATE and the INSERT
+        source_value = ("ISNULL(src.{0}, {1})" if 'uniqueidentifier' in col_type else
+                        "COALESCE(src.{0}, {1})").format(name, default)
+        set_statements.append("target.{0} = {1}".format(name, source_value))
+        where_conditions.append("COALESCE(target.{0}, {1}) <> COALESCE(src.{0}, {1}){2}".format(
+            name,
+            default,
+            " COLLATE DATABASE_DEFAULT" if 'nvarchar' in col_type else ""))
+        insert_columns.append(name)
+        select_columns.append(source_value)
+
+    return (
+        _LIST_SEPARATOR.join(set_statements),
+        _OR_SEPARATOR.join(where_conditions),
+        _LIST_SEPARATOR.join(insert_columns),
+        _LIST_SEPARATOR.join(select_columns),
+    )
+
+
+def generate_stored_procedure(target_table, source_table, columns):
+    # Without columns there is no join key and no valid procedure to build
+    if not columns:
+        return _EMPTY_SCRIPT
+
+    procedure_name = "stp_sync_{}".format(_TABLE_NAME_STRIP_RE.sub('', target_table))
+
+    names = tuple(quote_identifier(col.name) for col in columns)
+    set_statements, where_conditions, insert_columns, select_columns = (
+        template.format(*names)
+        for template in column_fragment_templates(tuple(col.type for col in columns))
+    )
+
+    return _PROCEDURE_TEMPLATE.render(
+        procedure_name=procedure_name,
+        target_table=target_table,
+        source_table=source_table,
+        set_statements=set_statements,
+        where_conditions=where_conditions,
+        insert_columns=insert_columns,
+        select_columns=select_columns,
+        first_col=names[0],  # The first column is the joining key
+    )